@@ -0,0 +1,274 @@
+"""Núcleo de decoración compilado para la representación SoA del árbol
+
+Módulo opcional: requiere numpy y numba. Cuando está disponible,
+AnalizadorSemantico decora los árboles grandes llamando a decorar_arbol,
+que corre la síntesis de atributos como un bucle entero compilado con
+@njit sobre los arreglos paralelos de Arbol en lugar del intérprete.
+
+Los errores no pueden formatearse dentro del kernel (no hay cadenas en
+modo nopython), así que se emiten como eventos (nodo, código, argumento)
+en orden de recorrido y el llamador los convierte en mensajes.
+"""
+
+import numpy as np
+from numba import njit
+
+# Codificación de símbolos como enteros pequeños
+P = 0
+C = 1
+A = 2
+LLAVE_ABRE = 3
+LLAVE_CIERRA = 4
+MONEDA = 5
+REFRESCO = 6
+DEVOLUCION = 7
+EPSILON = 8
+
+_CODIGOS = {'P': P, 'C': C, 'A': A, '{': LLAVE_ABRE, '}': LLAVE_CIERRA,
+            '$': MONEDA, 'R': REFRESCO, '<': DEVOLUCION, 'ε': EPSILON}
+
+# Códigos de los eventos de error que emite el kernel
+ERR_NIVEL = 1
+ERR_SALDO = 2
+ERR_REFRESCOS = 3
+ERR_DEVOLUCION = 4
+
+
+def codificar_simbolos(simbolos) -> 'np.ndarray':
+    """Convierte la lista de símbolos de un Arbol a un arreglo int8"""
+    codigos = np.empty(len(simbolos), np.int8)
+    for i, simbolo in enumerate(simbolos):
+        codigos[i] = _CODIGOS[simbolo]
+    return codigos
+
+
+@njit(cache=True)
+def decorar(simbolos, padres, hijos_off, hijos_len, hijos_flat,
+            saldo, refrescos, nivel, valido, err_start, err_end,
+            ev_nodo, ev_codigo, ev_arg):
+    """Decora el árbol SoA in place; devuelve la cantidad de errores
+
+    Replica la semántica de AnalizadorSemantico._decorar_arbol con la
+    misma pila (nodo, nivel, estado), pero preasignada y sobre enteros.
+    err_start/err_end reciben el rango de eventos de cada subárbol, en
+    las mismas posiciones de apertura y cierre que la versión Python.
+    """
+    n = len(simbolos)
+
+    # Cada nodo pasa a lo sumo tres veces por la pila y cada paso apila
+    # a lo sumo un hijo, así que 4n+1 entradas bastan
+    cap = 4 * n + 1
+    pila_nodo = np.empty(cap, np.int32)
+    pila_nivel = np.empty(cap, np.int32)
+    pila_estado = np.empty(cap, np.int32)
+
+    pila_nodo[0] = 0
+    pila_nivel[0] = 1
+    pila_estado[0] = 0
+    tope = 1
+    num_eventos = 0
+
+    while tope > 0:
+        tope -= 1
+        nodo = pila_nodo[tope]
+        niv = pila_nivel[tope]
+        estado = pila_estado[tope]
+
+        if estado == 0:
+            nivel[nodo] = niv
+
+            # Al entrar abre su rango de eventos; los puntos de cierre de
+            # cada producción lo sellan, cubriendo todo el subárbol
+            err_start[nodo] = num_eventos
+            err_end[nodo] = num_eventos
+
+            # Verificar límite de anidación
+            if niv > 3:
+                valido[nodo] = 0
+                ev_nodo[num_eventos] = nodo
+                ev_codigo[num_eventos] = ERR_NIVEL
+                ev_arg[num_eventos] = niv
+                num_eventos += 1
+                err_end[nodo] = num_eventos
+                continue
+
+            sim = simbolos[nodo]
+            off = hijos_off[nodo]
+            num_hijos = hijos_len[nodo]
+
+            if sim == P:
+                # P → { C }
+                if num_hijos >= 2:
+                    pila_nodo[tope] = nodo
+                    pila_nivel[tope] = niv
+                    pila_estado[tope] = 1
+                    tope += 1
+                    pila_nodo[tope] = hijos_flat[off + 1]
+                    pila_nivel[tope] = niv
+                    pila_estado[tope] = 0
+                    tope += 1
+
+            elif sim == C:
+                if num_hijos == 1 and simbolos[hijos_flat[off]] == EPSILON:
+                    # C → ε
+                    saldo[nodo] = 0
+                    valido[nodo] = 1
+                    refrescos[nodo] = 0
+                elif num_hijos == 2:
+                    # C → A C: decorar A primero
+                    pila_nodo[tope] = nodo
+                    pila_nivel[tope] = niv
+                    pila_estado[tope] = 1
+                    tope += 1
+                    pila_nodo[tope] = hijos_flat[off]
+                    pila_nivel[tope] = niv
+                    pila_estado[tope] = 0
+                    tope += 1
+
+            elif sim == A:
+                if num_hijos == 1:
+                    # A → $ | R | <
+                    terminal = simbolos[hijos_flat[off]]
+                    padre = padres[nodo]
+                    saldo_actual = saldo[padre] if padre >= 0 else 0
+                    refrescos_actual = refrescos[padre] if padre >= 0 else 0
+
+                    if terminal == MONEDA:
+                        saldo[nodo] = saldo_actual + 1
+                        valido[nodo] = 1
+                        refrescos[nodo] = refrescos_actual
+                    elif terminal == REFRESCO:
+                        if saldo_actual < 3:
+                            valido[nodo] = 0
+                            ev_nodo[num_eventos] = nodo
+                            ev_codigo[num_eventos] = ERR_SALDO
+                            ev_arg[num_eventos] = saldo_actual
+                            num_eventos += 1
+                            saldo[nodo] = saldo_actual
+                            refrescos[nodo] = refrescos_actual
+                        elif refrescos_actual >= 3:
+                            valido[nodo] = 0
+                            ev_nodo[num_eventos] = nodo
+                            ev_codigo[num_eventos] = ERR_REFRESCOS
+                            ev_arg[num_eventos] = refrescos_actual
+                            num_eventos += 1
+                            saldo[nodo] = saldo_actual
+                            refrescos[nodo] = refrescos_actual
+                        else:
+                            saldo[nodo] = saldo_actual - 3
+                            valido[nodo] = 1
+                            refrescos[nodo] = refrescos_actual + 1
+                    elif terminal == DEVOLUCION:
+                        if saldo_actual < 1:
+                            valido[nodo] = 0
+                            ev_nodo[num_eventos] = nodo
+                            ev_codigo[num_eventos] = ERR_DEVOLUCION
+                            ev_arg[num_eventos] = saldo_actual
+                            num_eventos += 1
+                            saldo[nodo] = saldo_actual
+                        else:
+                            saldo[nodo] = saldo_actual - 1
+                            valido[nodo] = 1
+                        refrescos[nodo] = refrescos_actual
+                    err_end[nodo] = num_eventos
+                elif num_hijos == 3:
+                    # A → { C }: incrementar nivel para el bloque anidado
+                    pila_nodo[tope] = nodo
+                    pila_nivel[tope] = niv
+                    pila_estado[tope] = 1
+                    tope += 1
+                    pila_nodo[tope] = hijos_flat[off + 1]
+                    pila_nivel[tope] = niv + 1
+                    pila_estado[tope] = 0
+                    tope += 1
+
+        elif estado == 1:
+            sim = simbolos[nodo]
+            off = hijos_off[nodo]
+
+            if sim == P:
+                # P → { C }
+                nodo_c = hijos_flat[off + 1]
+                saldo[nodo] = saldo[nodo_c]
+                valido[nodo] = valido[nodo_c]
+                refrescos[nodo] = refrescos[nodo_c]
+                err_end[nodo] = num_eventos
+
+            elif sim == C:
+                # C → A C: heredar estado de A
+                nodo_a = hijos_flat[off]
+                nodo_c = hijos_flat[off + 1]
+
+                saldo[nodo] = saldo[nodo_a]
+                valido[nodo] = valido[nodo_a]
+                refrescos[nodo] = refrescos[nodo_a]
+
+                # Decorar C con el estado actualizado
+                saldo[nodo_c] = saldo[nodo]
+                refrescos[nodo_c] = refrescos[nodo]
+                pila_nodo[tope] = nodo
+                pila_nivel[tope] = niv
+                pila_estado[tope] = 2
+                tope += 1
+                pila_nodo[tope] = nodo_c
+                pila_nivel[tope] = niv
+                pila_estado[tope] = 0
+                tope += 1
+
+            else:
+                # A → { C }: el bloque anidado es independiente
+                nodo_c = hijos_flat[off + 1]
+                padre = padres[nodo]
+                saldo[nodo] = saldo[padre] if padre >= 0 else 0
+                valido[nodo] = valido[nodo_c]
+                refrescos[nodo] = refrescos[padre] if padre >= 0 else 0
+                err_end[nodo] = num_eventos
+
+        else:
+            # C → A C: actualizar estado final con el resultado del C hermano
+            nodo_c = hijos_flat[hijos_off[nodo] + 1]
+            saldo[nodo] = saldo[nodo_c]
+            if valido[nodo_c] == 0:
+                valido[nodo] = 0
+            refrescos[nodo] = refrescos[nodo_c]
+            err_end[nodo] = num_eventos
+
+    return num_eventos
+
+
+def decorar_arbol(arbol) -> tuple:
+    """Decora un Arbol (SoA) in place con el kernel compilado
+
+    Devuelve (eventos, err_start, err_end): los eventos de error como
+    lista de (nodo, codigo, argumento) en orden de recorrido y, por cada
+    nodo, el rango de eventos de su subárbol.
+    """
+    n = len(arbol)
+    simbolos = codificar_simbolos(arbol.simbolo)
+
+    # Vistas escribibles sobre los buffers de Arbol: el kernel decora
+    # in place, sin copiar los arreglos
+    padres = np.frombuffer(arbol.padre, np.int32)
+    hijos_off = np.frombuffer(arbol.hijos_off, np.int32)
+    hijos_len = np.frombuffer(arbol.hijos_len, np.int32)
+    hijos_flat = np.frombuffer(arbol.hijos_flat, np.int32)
+    saldo = np.frombuffer(arbol.saldo, np.int32)
+    refrescos = np.frombuffer(arbol.refrescos, np.int32)
+    nivel = np.frombuffer(arbol.nivel, np.int32)
+    valido = np.frombuffer(arbol.valido, np.int8)
+
+    # A lo sumo un evento por nodo A o C; los nodos no visitados quedan
+    # con el rango vacío [0, 0)
+    ev_nodo = np.empty(n, np.int32)
+    ev_codigo = np.empty(n, np.int8)
+    ev_arg = np.empty(n, np.int32)
+    err_start = np.zeros(n, np.int32)
+    err_end = np.zeros(n, np.int32)
+
+    num_eventos = decorar(simbolos, padres, hijos_off, hijos_len, hijos_flat,
+                          saldo, refrescos, nivel, valido, err_start, err_end,
+                          ev_nodo, ev_codigo, ev_arg)
+
+    eventos = [(int(ev_nodo[i]), int(ev_codigo[i]), int(ev_arg[i]))
+               for i in range(num_eventos)]
+    return eventos, err_start, err_end
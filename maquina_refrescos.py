@@ -1,59 +1,362 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext
+import io
 import json
+import re
+import sys
+from array import array
+from collections import OrderedDict
 from typing import List, Dict, Any, Optional, Tuple
 
+try:
+    import analizador_kernel
+except ImportError:
+    # numpy/numba son opcionales; sin ellos se decora en Python puro
+    analizador_kernel = None
+
+# Cantidad mínima de tokens para que compense armar la forma SoA y
+# llamar al kernel compilado en lugar de decorar en Python
+_UMBRAL_KERNEL = 64
+
 class Nodo:
-    """Representa un nodo en el árbol de derivación"""
+    """Representa un nodo en el árbol de derivación
+
+    Construir Nodo(simbolo, tipo) devuelve la subclase adecuada: los
+    terminales ({, }, $, R, <, ε) nunca usan los atributos semánticos,
+    así que los comparten como valores de clase en lugar de inicializar
+    cada campo (y una lista de hijos vacía) por hoja.
+    """
+
+    __slots__ = ()
+
+    def __new__(cls, simbolo: str, tipo: str = "terminal"):
+        if cls is Nodo:
+            cls = NodoNoTerminal if tipo == "no_terminal" else NodoTerminal
+        return object.__new__(cls)
+
+    def __str__(self):
+        return f"{self.simbolo} (saldo={self.saldo}, valido={self.valido}, nivel={self.nivel})"
+
+
+class NodoTerminal(Nodo):
+    """Hoja del árbol: solo símbolo y padre, el resto es fijo"""
+
+    __slots__ = ('simbolo', 'padre')
+
+    tipo = "terminal"
+    hijos: Tuple['Nodo', ...] = ()
+    saldo = 0
+    valido = True
+    nivel = 0
+    refrescos_comprados = 0
+    err_start = 0
+    err_end = 0
+    decorado = True
+
     def __init__(self, simbolo: str, tipo: str = "terminal"):
-        self.simbolo = simbolo
+        # Los símbolos son un puñado de cadenas de un carácter que se
+        # repiten en todo el árbol; internarlas evita duplicados
+        self.simbolo = sys.intern(simbolo)
+        self.padre: Optional['Nodo'] = None
+
+
+class NodoNoTerminal(Nodo):
+    """Nodo interno (P, C, A) con los atributos semánticos por instancia"""
+
+    # Sin __dict__ por instancia: con miles de nodos por árbol, __slots__
+    # reduce la memoria por nodo a menos de la mitad
+    __slots__ = ('simbolo', 'tipo', 'hijos', 'padre', 'saldo', 'valido',
+                 'nivel', 'refrescos_comprados', 'err_start', 'err_end',
+                 'decorado')
+
+    def __init__(self, simbolo: str, tipo: str = "no_terminal"):
+        self.simbolo = sys.intern(simbolo)
         self.tipo = tipo  # "terminal" o "no_terminal"
         self.hijos: List['Nodo'] = []
         self.padre: Optional['Nodo'] = None
-        
-        # Atributos semánticos
+
+        # Atributos semánticos. Los errores del subárbol de este nodo son
+        # el rango [err_start, err_end) de la lista errores_globales del
+        # analizador; un rango vacío significa sin errores
         self.saldo = 0
         self.valido = True
         self.nivel = 0
         self.refrescos_comprados = 0
-        self.errores: List[str] = []
-        
+        self.err_start = 0
+        self.err_end = 0
+        self.decorado = False
+
     def agregar_hijo(self, hijo: 'Nodo'):
         """Agrega un hijo al nodo"""
         hijo.padre = self
         self.hijos.append(hijo)
-        
-    def __str__(self):
-        return f"{self.simbolo} (saldo={self.saldo}, valido={self.valido}, nivel={self.nivel})"
+
+class Arbol:
+    """Representación compacta del árbol en arreglos paralelos (SoA)
+
+    En lugar de un objeto Nodo por nodo, los atributos viven en arreglos
+    paralelos indexados por un id entero: array('i') empaqueta cada campo
+    numérico en 4 bytes y los hijos de cada nodo quedan contiguos en
+    hijos_flat, lo que hace los recorridos masivos amigables con la caché.
+    """
+
+    TERMINAL = 0
+    NO_TERMINAL = 1
+
+    def __init__(self):
+        self.simbolo: List[str] = []
+        self.tipo = bytearray()
+        self.padre = array('i')
+        self.hijos_off = array('i')
+        self.hijos_len = array('i')
+        self.hijos_flat = array('i')
+
+        # Atributos semánticos
+        self.saldo = array('i')
+        self.refrescos = array('i')
+        self.nivel = array('i')
+        self.valido = bytearray()
+
+    def __len__(self):
+        return len(self.simbolo)
+
+    def hijos(self, nodo: int) -> array:
+        """Ids de los hijos del nodo dado"""
+        off = self.hijos_off[nodo]
+        return self.hijos_flat[off:off + self.hijos_len[nodo]]
+
+    @classmethod
+    def desde_nodo(cls, raiz: Nodo) -> 'Arbol':
+        """Aplana un árbol de Nodo en arreglos paralelos
+
+        Los ids se asignan por niveles (la raíz es 0), de modo que los
+        hijos de cada nodo reciben ids consecutivos.
+        """
+        arbol = cls()
+
+        nodos = [raiz]
+        indices = {id(raiz): 0}
+        i = 0
+        while i < len(nodos):
+            for hijo in nodos[i].hijos:
+                indices[id(hijo)] = len(nodos)
+                nodos.append(hijo)
+            i += 1
+
+        for nodo in nodos:
+            arbol.simbolo.append(nodo.simbolo)
+            arbol.tipo.append(cls.NO_TERMINAL if nodo.tipo == "no_terminal" else cls.TERMINAL)
+            arbol.padre.append(indices[id(nodo.padre)] if nodo.padre is not None else -1)
+            arbol.hijos_off.append(len(arbol.hijos_flat))
+            arbol.hijos_len.append(len(nodo.hijos))
+            for hijo in nodo.hijos:
+                arbol.hijos_flat.append(indices[id(hijo)])
+
+            arbol.saldo.append(nodo.saldo)
+            arbol.refrescos.append(nodo.refrescos_comprados)
+            arbol.nivel.append(nodo.nivel)
+            arbol.valido.append(1 if nodo.valido else 0)
+
+        return arbol
+
+    def aplicar_a_nodos(self, raiz: Nodo):
+        """Copia los atributos semánticos de los arreglos al árbol de Nodo
+
+        Recorre el árbol en el mismo orden por niveles que desde_nodo,
+        por lo que los ids coinciden.
+        """
+        nodos = [raiz]
+        i = 0
+        while i < len(nodos):
+            nodo = nodos[i]
+            # Los terminales nunca se decoran: conservan sus valores fijos
+            if nodo.tipo == "no_terminal":
+                nodo.saldo = self.saldo[i]
+                nodo.refrescos_comprados = self.refrescos[i]
+                nodo.nivel = self.nivel[i]
+                nodo.valido = bool(self.valido[i])
+            nodos.extend(nodo.hijos)
+            i += 1
 
 class AnalizadorSemantico:
     """Analizador semántico para la máquina expendedora"""
-    
+
+    # Alfabeto de terminales como bytes: la validación escanea la cadena
+    # codificada en ASCII, donde indexar devuelve enteros pequeños sin
+    # crear un objeto str por carácter. El prefijo válido se reconoce con
+    # un autómata de re en una sola llamada en C; match.end() señala el
+    # primer carácter inválido
+    _CHARSET_RE = re.compile(rb'[{}$R< ]*')
+    _LLAVE_ABRE = ord('{')
+    _LLAVE_CIERRA = ord('}')
+
+    # Entradas máximas de la caché de análisis completos
+    _CAPACIDAD_CACHE = 128
+
     def __init__(self):
         self.errores_globales: List[str] = []
-        
-    def analizar_cadena(self, cadena: str) -> Tuple[Nodo, bool]:
+
+        # Caché LRU de análisis completos:
+        # (cadena normalizada, memoize) -> (raiz, es_valida, errores)
+        self._parse_cache: "OrderedDict[Tuple[str, bool], Tuple[Optional[Nodo], bool, List[str]]]" = OrderedDict()
+
+        # Memoización opcional de bloques anidados repetidos:
+        # (contenido normalizado, nivel) -> (saldo, refrescos, valido, errores)
+        self._cache: Dict[Tuple[str, int], Tuple[int, int, bool, List[str]]] = {}
+        self._memoizar = False
+        self._memo_pendientes: List[Tuple[Tuple[str, int], Nodo]] = []
+
+        # id(nodo) -> errores cacheados de los nodos comprimidos, que la
+        # decoración reemite en orden de recorrido
+        self._predecorados: Dict[int, List[str]] = {}
+
+        # Despacho por símbolo para la decoración: expansión (estado 0),
+        # síntesis (estado 1) y acciones de A → $ | R | <. Una búsqueda en
+        # dict reemplaza las cadenas de comparaciones de cadenas por nodo
+        self._expansores = {'P': self._expandir_P, 'C': self._expandir_C,
+                            'A': self._expandir_A}
+        self._sintetizadores = {'P': self._sintetizar_P, 'C': self._sintetizar_C,
+                                'A': self._sintetizar_A_bloque}
+        self._acciones = {'$': self._accion_moneda, 'R': self._accion_refresco,
+                          '<': self._accion_devolucion}
+
+    def analizar_cadena(self, cadena: str, memoize: bool = False) -> Tuple[Nodo, bool]:
         """
-        Analiza una cadena y construye el árbol de derivación con análisis semántico
+        Analiza una cadena y construye el árbol de derivación con análisis semántico.
+        Con memoize=True, los bloques anidados con el mismo texto se analizan
+        una sola vez y sus repeticiones se representan comprimidas (útil cuando
+        la entrada repite bloques; con entradas sin repetición solo agrega costo).
         Retorna: (nodo_raiz, es_valida)
         """
+        # Mismo texto, mismo resultado: el árbol y sus errores no se
+        # mutan después de decorar, así que pueden compartirse tal cual
+        clave = (cadena.strip(), memoize)
+        resultado = self._parse_cache.get(clave)
+        if resultado is not None:
+            self._parse_cache.move_to_end(clave)
+            raiz, es_valida, errores = resultado
+            self.errores_globales = list(errores)
+            return raiz, es_valida
+
         self.errores_globales = []
-        
+        self._memoizar = memoize
+        self._memo_pendientes = []
+        self._predecorados = {}
+
         # Validar sintaxis básica
         if not self._validar_sintaxis(cadena):
+            self._guardar_en_cache(clave, None, False)
             return None, False
-            
+
         # Construir árbol de derivación
         raiz = self._construir_arbol(cadena)
-        
-        # Decorar con atributos semánticos
-        self._decorar_arbol(raiz, nivel=1)
-        
+
+        # Decorar con atributos semánticos: los árboles grandes van al
+        # kernel compilado si está disponible (los comprimidos por
+        # memoización llevan errores ya materializados, así que no)
+        if (analizador_kernel is not None and not memoize
+                and len(cadena) - cadena.count(' ') > _UMBRAL_KERNEL):
+            self._decorar_con_kernel(raiz)
+        else:
+            self._decorar_arbol(raiz, nivel=1)
+
+        # Guardar en caché los bloques analizados en esta pasada
+        for clave_memo, nodo_c in self._memo_pendientes:
+            self._cache[clave_memo] = (nodo_c.saldo, nodo_c.refrescos_comprados,
+                                       nodo_c.valido,
+                                       self.errores_globales[nodo_c.err_start:nodo_c.err_end])
+
         # Verificar validez global
         es_valida = raiz.valido and len(self.errores_globales) == 0
-        
+
+        self._guardar_en_cache(clave, raiz, es_valida)
         return raiz, es_valida
-    
+
+    def _guardar_en_cache(self, clave: Tuple[str, bool], raiz: Optional[Nodo], es_valida: bool):
+        """Inserta un resultado en la caché LRU, expulsando el más viejo"""
+        self._parse_cache[clave] = (raiz, es_valida, list(self.errores_globales))
+        if len(self._parse_cache) > self._CAPACIDAD_CACHE:
+            self._parse_cache.popitem(last=False)
+
+    def limpiar_cache(self):
+        """Vacía la caché de análisis y la de bloques memoizados"""
+        self._parse_cache.clear()
+        self._cache.clear()
+
+    def validar_rapido(self, cadena: str) -> Tuple[bool, List[str]]:
+        """
+        Valida una cadena en una sola pasada, sin construir el árbol.
+        Mantiene una pila de (saldo, refrescos) por bloque abierto, por lo
+        que equivale a analizar_cadena para decidir validez pero evita la
+        construcción y decoración del árbol cuando no hace falta mostrarlo.
+        Retorna: (es_valida, errores)
+        """
+        errores: List[str] = []
+        cadena = cadena.strip()
+
+        # Verificar que empiece y termine con llaves
+        if not cadena.startswith('{') or not cadena.endswith('}'):
+            errores.append("La cadena debe empezar con '{' y terminar con '}'")
+            return False, errores
+
+        pila: List[Tuple[int, int]] = []  # (saldo, refrescos) por bloque
+        omitidos = 0  # llaves abiertas dentro de un bloque que excede la anidación
+        balance = 0  # balance de llaves sobre toda la cadena
+
+        for char in cadena:
+            if char == '{':
+                balance += 1
+                if omitidos or len(pila) >= 3:
+                    if not omitidos:
+                        errores.append(f"Excede el límite de 3 niveles de anidación (nivel {len(pila) + 1})")
+                    omitidos += 1
+                else:
+                    pila.append((0, 0))
+            elif char == '}':
+                balance -= 1
+                if balance < 0:
+                    errores.append("Llaves desbalanceadas")
+                    return False, errores
+                if omitidos:
+                    omitidos -= 1
+                elif len(pila) > 1:
+                    pila.pop()
+                else:
+                    # Cierre suelto al nivel superior: el árbol lo deriva
+                    # como un A sin hijos cuyos atributos por defecto
+                    # reinician el estado del bloque
+                    pila[-1] = (0, 0)
+            elif omitidos:
+                if char not in ('$', 'R', '<', ' '):
+                    errores.append(f"Carácter inválido: '{char}'")
+                    return False, errores
+            elif char == '$':
+                saldo, refrescos = pila[-1]
+                pila[-1] = (saldo + 1, refrescos)
+            elif char == 'R':
+                saldo, refrescos = pila[-1]
+                if saldo < 3:
+                    errores.append(f"Saldo insuficiente para comprar refresco (saldo: {saldo}, necesario: 3)")
+                elif refrescos >= 3:
+                    errores.append("Excede el máximo de 3 refrescos por bloque")
+                else:
+                    pila[-1] = (saldo - 3, refrescos + 1)
+            elif char == '<':
+                saldo, refrescos = pila[-1]
+                if saldo < 1:
+                    errores.append("No hay monedas para devolver")
+                else:
+                    pila[-1] = (saldo - 1, refrescos)
+            elif char != ' ':
+                errores.append(f"Carácter inválido: '{char}'")
+                return False, errores
+
+        if balance != 0:
+            errores.append("Llaves desbalanceadas")
+            return False, errores
+
+        return len(errores) == 0, errores
+
     def _validar_sintaxis(self, cadena: str) -> bool:
         """Validación sintáctica básica"""
         # Verificar que empiece y termine con llaves
@@ -62,287 +365,456 @@ class AnalizadorSemantico:
             self.errores_globales.append("La cadena debe empezar con '{' y terminar con '}'")
             return False
             
-        # Verificar balance de llaves
+        # Codificar una sola vez: indexar e iterar bytes produce enteros
+        # pequeños en lugar de objetos str de un carácter
+        try:
+            datos = cadena.encode('ascii')
+        except UnicodeEncodeError as exc:
+            self.errores_globales.append(f"Carácter inválido: '{cadena[exc.start]}'")
+            return False
+
+        # Prefiltro barato de balance: dos conteos en C. Solo si coinciden
+        # vale la pena la pasada completa en Python, que detecta cierres
+        # antes de tiempo ('}' sin '{' previa)
+        if datos.count(self._LLAVE_ABRE) != datos.count(self._LLAVE_CIERRA):
+            self.errores_globales.append("Llaves desbalanceadas")
+            return False
+
         nivel = 0
-        for char in cadena:
-            if char == '{':
+        abre = self._LLAVE_ABRE
+        cierra = self._LLAVE_CIERRA
+        for byte in datos:
+            if byte == abre:
                 nivel += 1
-            elif char == '}':
+            elif byte == cierra:
                 nivel -= 1
                 if nivel < 0:
                     self.errores_globales.append("Llaves desbalanceadas")
                     return False
-        
-        if nivel != 0:
-            self.errores_globales.append("Llaves desbalanceadas")
+
+        # Verificar caracteres válidos con el autómata compilado
+        coincidencia = self._CHARSET_RE.match(datos)
+        if coincidencia.end() != len(datos):
+            self.errores_globales.append(f"Carácter inválido: '{chr(datos[coincidencia.end()])}'")
             return False
-            
-        # Verificar caracteres válidos
-        caracteres_validos = set('{}$R< ')
-        for char in cadena:
-            if char not in caracteres_validos:
-                self.errores_globales.append(f"Carácter inválido: '{char}'")
-                return False
-                
+
         return True
     
+    @staticmethod
+    def _tabla_llaves(cadena: str) -> List[int]:
+        """Empareja cada llave con su pareja en una sola pasada
+
+        tabla[i] es el índice de la llave que cierra (o abre) la llave en
+        la posición i; las demás posiciones quedan en -1.
+        """
+        tabla = [-1] * len(cadena)
+        pila: List[int] = []
+        for i, char in enumerate(cadena):
+            if char == '{':
+                pila.append(i)
+            elif char == '}' and pila:
+                j = pila.pop()
+                tabla[j] = i
+                tabla[i] = j
+        return tabla
+
     def _construir_arbol(self, cadena: str) -> Nodo:
         """Construye el árbol de derivación"""
+        cadena = cadena.strip()
         raiz = Nodo("P", "no_terminal")
-        
+
         # P → { C }
         llave_izq = Nodo("{", "terminal")
         nodo_c = Nodo("C", "no_terminal")
         llave_der = Nodo("}", "terminal")
-        
+
         raiz.agregar_hijo(llave_izq)
         raiz.agregar_hijo(nodo_c)
         raiz.agregar_hijo(llave_der)
-        
-        # Procesar contenido entre llaves
-        contenido = cadena[1:-1].strip()
-        self._procesar_contenido(nodo_c, contenido)
-        
+
+        # Procesar contenido entre llaves; la tabla de llaves emparejadas
+        # se calcula una sola vez para toda la cadena
+        tabla = self._tabla_llaves(cadena)
+        self._procesar_contenido(nodo_c, cadena, 1, len(cadena) - 1, tabla)
+
         return raiz
-    
-    def _procesar_contenido(self, nodo_c: Nodo, contenido: str):
-        """Procesa el contenido de un bloque C"""
-        if not contenido:
-            # C → ε
-            epsilon = Nodo("ε", "terminal")
-            nodo_c.agregar_hijo(epsilon)
-            return
-            
-        i = 0
-        while i < len(contenido):
-            char = contenido[i]
-            
-            if char == ' ':
-                i += 1
-                continue
-                
-            # C → A C
-            nodo_a = Nodo("A", "no_terminal")
-            nodo_c_siguiente = Nodo("C", "no_terminal")
-            nodo_c.agregar_hijo(nodo_a)
-            nodo_c.agregar_hijo(nodo_c_siguiente)
-            
-            if char in ['$', 'R', '<']:
-                # A → $ | R | <
-                terminal = Nodo(char, "terminal")
-                nodo_a.agregar_hijo(terminal)
-                i += 1
-            elif char == '{':
-                # A → { C }
-                # Encontrar la llave de cierre correspondiente
-                nivel = 1
-                j = i + 1
-                while j < len(contenido) and nivel > 0:
-                    if contenido[j] == '{':
-                        nivel += 1
-                    elif contenido[j] == '}':
-                        nivel -= 1
-                    j += 1
-                
-                bloque_completo = contenido[i:j]
-                
-                llave_izq = Nodo("{", "terminal")
-                nodo_c_interno = Nodo("C", "no_terminal")
-                llave_der = Nodo("}", "terminal")
-                
-                nodo_a.agregar_hijo(llave_izq)
-                nodo_a.agregar_hijo(nodo_c_interno)
-                nodo_a.agregar_hijo(llave_der)
-                
-                # Procesar contenido del bloque anidado
-                contenido_interno = bloque_completo[1:-1]
-                self._procesar_contenido(nodo_c_interno, contenido_interno)
-                
-                i = j
-            else:
+
+    def _procesar_contenido(self, nodo_c: Nodo, cadena: str, inicio: int,
+                            fin: int, tabla: List[int], nivel: int = 1):
+        """Procesa el contenido de un bloque C (rango [inicio, fin) de cadena)"""
+        # Lista de trabajo explícita de (nodo_c, inicio, fin, nivel) para
+        # evitar la recursión en bloques anidados; se trabaja con índices
+        # sobre la cadena original en lugar de rebanadas por bloque
+        pendientes: List[Tuple[Nodo, int, int, int]] = [(nodo_c, inicio, fin, nivel)]
+
+        while pendientes:
+            nodo_c, i, fin, nivel = pendientes.pop()
+
+            # Saltar espacios iniciales
+            while i < fin and cadena[i] == ' ':
                 i += 1
-            
-            # Actualizar nodo_c para la siguiente iteración
-            contenido_restante = contenido[i:].strip()
-            if not contenido_restante:
+
+            if i >= fin:
+                # C → ε
                 epsilon = Nodo("ε", "terminal")
-                nodo_c_siguiente.agregar_hijo(epsilon)
-                break
-            else:
+                nodo_c.agregar_hijo(epsilon)
+                continue
+
+            while i < fin:
+                char = cadena[i]
+
+                # C → A C
+                nodo_a = Nodo("A", "no_terminal")
+                nodo_c_siguiente = Nodo("C", "no_terminal")
+                nodo_c.agregar_hijo(nodo_a)
+                nodo_c.agregar_hijo(nodo_c_siguiente)
+
+                if char in ('$', 'R', '<'):
+                    # A → $ | R | <
+                    terminal = Nodo(char, "terminal")
+                    nodo_a.agregar_hijo(terminal)
+                    i += 1
+                elif char == '{':
+                    # A → { C }: la llave de cierre sale de la tabla en O(1)
+                    j = tabla[i]
+                    if j < 0 or j > fin:
+                        # Sin pareja dentro del rango (entrada mal formada)
+                        j = fin
+
+                    llave_izq = Nodo("{", "terminal")
+                    nodo_c_interno = Nodo("C", "no_terminal")
+                    llave_der = Nodo("}", "terminal")
+
+                    nodo_a.agregar_hijo(llave_izq)
+                    nodo_a.agregar_hijo(nodo_c_interno)
+                    nodo_a.agregar_hijo(llave_der)
+
+                    # Encolar el contenido del bloque anidado
+                    if self._memoizar:
+                        contenido_interno = cadena[i + 1:j]
+                        clave = (' '.join(contenido_interno.split()), nivel + 1)
+                        cacheado = self._cache.get(clave)
+                        if cacheado is not None:
+                            # Bloque ya analizado: C comprimido con los
+                            # atributos cacheados, sin reconstruir los hijos
+                            saldo, refrescos, valido, errores = cacheado
+                            nodo_c_interno.saldo = saldo
+                            nodo_c_interno.refrescos_comprados = refrescos
+                            nodo_c_interno.valido = valido
+                            nodo_c_interno.nivel = nivel + 1
+                            self._predecorados[id(nodo_c_interno)] = errores
+                        else:
+                            pendientes.append((nodo_c_interno, i + 1, j, nivel + 1))
+                            if self._es_cacheable(contenido_interno, nivel + 1):
+                                self._memo_pendientes.append((clave, nodo_c_interno))
+                    else:
+                        pendientes.append((nodo_c_interno, i + 1, j, nivel + 1))
+
+                    i = j + 1
+                else:
+                    i += 1
+
+                # Saltar espacios y cerrar con ε si no queda contenido
+                while i < fin and cadena[i] == ' ':
+                    i += 1
+                if i >= fin:
+                    epsilon = Nodo("ε", "terminal")
+                    nodo_c_siguiente.agregar_hijo(epsilon)
+                    break
                 nodo_c = nodo_c_siguiente
+
+    def _es_cacheable(self, contenido: str, nivel: int) -> bool:
+        """Decide si un bloque puede memoizarse
+
+        Los bloques con sub-bloques que exceden el límite de anidación
+        generan un error global por aparición, así que no se cachean.
+        """
+        profundidad = maxima = 0
+        for char in contenido:
+            if char == '{':
+                profundidad += 1
+                if profundidad > maxima:
+                    maxima = profundidad
+            elif char == '}':
+                profundidad -= 1
+        return nivel + maxima <= 3
     
     def _decorar_arbol(self, nodo: Nodo, nivel: int = 1):
-        """Decora el árbol con atributos semánticos"""
-        nodo.nivel = nivel
-        
-        # Verificar límite de anidación
-        if nivel > 3:
-            nodo.valido = False
-            nodo.errores.append(f"Excede el límite de 3 niveles de anidación (nivel {nivel})")
-            self.errores_globales.append(f"Excede el límite de 3 niveles de anidación")
-            return
-        
-        if nodo.simbolo == "P":
-            # P → { C }
-            if len(nodo.hijos) >= 2:
-                nodo_c = nodo.hijos[1]  # El nodo C
-                self._decorar_arbol(nodo_c, nivel)
-                nodo.saldo = nodo_c.saldo
-                nodo.valido = nodo_c.valido
-                nodo.refrescos_comprados = nodo_c.refrescos_comprados
-                nodo.errores.extend(nodo_c.errores)
-                
-        elif nodo.simbolo == "C":
-            if len(nodo.hijos) == 1 and nodo.hijos[0].simbolo == "ε":
-                # C → ε
-                nodo.saldo = 0
-                nodo.valido = True
-                nodo.refrescos_comprados = 0
-            elif len(nodo.hijos) == 2:
-                # C → A C
-                nodo_a = nodo.hijos[0]
+        """Decora el árbol con atributos semánticos (postorden iterativo)"""
+        # Pila explícita de (nodo, nivel, estado) en lugar de recursión:
+        # estado 0 = expandir hijos, estado 1 = sintetizar atributos,
+        # estado 2 = síntesis final de C → A C (tras decorar el C hermano)
+        pila: List[Tuple[Nodo, int, int]] = [(nodo, nivel, 0)]
+
+        while pila:
+            nodo, nivel, estado = pila.pop()
+
+            if estado == 0:
+                if nodo.decorado:
+                    continue
+                nodo.decorado = True
+
+                errores_cacheados = self._predecorados.get(id(nodo))
+                if errores_cacheados is not None:
+                    # Nodo comprimido por memoización: reemitir sus errores
+                    # en orden de recorrido para que los rangos de los
+                    # ancestros los cubran
+                    nodo.err_start = len(self.errores_globales)
+                    self.errores_globales.extend(errores_cacheados)
+                    nodo.err_end = len(self.errores_globales)
+                    continue
+
+                nodo.nivel = nivel
+
+                # Al entrar abre su rango de errores; los puntos de cierre
+                # de cada producción lo sellan, cubriendo todo el subárbol
+                nodo.err_start = len(self.errores_globales)
+                nodo.err_end = nodo.err_start
+
+                # Verificar límite de anidación
+                if nivel > 3:
+                    nodo.valido = False
+                    self.errores_globales.append(f"Excede el límite de 3 niveles de anidación (nivel {nivel})")
+                    nodo.err_end = len(self.errores_globales)
+                    continue
+
+                manejador = self._expansores.get(nodo.simbolo)
+                if manejador:
+                    manejador(nodo, nivel, pila)
+
+            elif estado == 1:
+                self._sintetizadores[nodo.simbolo](nodo, nivel, pila)
+
+            else:
+                # C → A C: actualizar estado final con el resultado del C hermano
                 nodo_c = nodo.hijos[1]
-                
-                # Decorar A primero
-                self._decorar_arbol(nodo_a, nivel)
-                
-                # Heredar estado de A
-                nodo.saldo = nodo_a.saldo
-                nodo.valido = nodo_a.valido
-                nodo.refrescos_comprados = nodo_a.refrescos_comprados
-                nodo.errores.extend(nodo_a.errores)
-                
-                # Decorar C con el estado actualizado
-                nodo_c.saldo = nodo.saldo
-                nodo_c.refrescos_comprados = nodo.refrescos_comprados
-                self._decorar_arbol(nodo_c, nivel)
-                
-                # Actualizar estado final
                 nodo.saldo = nodo_c.saldo
                 nodo.valido = nodo.valido and nodo_c.valido
                 nodo.refrescos_comprados = nodo_c.refrescos_comprados
-                nodo.errores.extend(nodo_c.errores)
-                
-        elif nodo.simbolo == "A":
-            if len(nodo.hijos) == 1:
-                hijo = nodo.hijos[0]
-                
-                if hijo.simbolo == "$":
-                    # Insertar moneda
-                    nodo.saldo = (nodo.padre.saldo if nodo.padre else 0) + 1
-                    nodo.valido = True
-                    nodo.refrescos_comprados = nodo.padre.refrescos_comprados if nodo.padre else 0
-                    
-                elif hijo.simbolo == "R":
-                    # Comprar refresco
-                    saldo_actual = nodo.padre.saldo if nodo.padre else 0
-                    refrescos_actual = nodo.padre.refrescos_comprados if nodo.padre else 0
-                    
-                    if saldo_actual < 3:
-                        nodo.valido = False
-                        nodo.errores.append(f"Saldo insuficiente para comprar refresco (saldo: {saldo_actual}, necesario: 3)")
-                        nodo.saldo = saldo_actual
-                        nodo.refrescos_comprados = refrescos_actual
-                    elif refrescos_actual >= 3:
-                        nodo.valido = False
-                        nodo.errores.append("Excede el máximo de 3 refrescos por bloque")
-                        nodo.saldo = saldo_actual
-                        nodo.refrescos_comprados = refrescos_actual
-                    else:
-                        nodo.saldo = saldo_actual - 3
-                        nodo.valido = True
-                        nodo.refrescos_comprados = refrescos_actual + 1
-                        
-                elif hijo.simbolo == "<":
-                    # Devolver moneda
-                    saldo_actual = nodo.padre.saldo if nodo.padre else 0
-                    
-                    if saldo_actual < 1:
-                        nodo.valido = False
-                        nodo.errores.append("No hay monedas para devolver")
-                        nodo.saldo = saldo_actual
-                    else:
-                        nodo.saldo = saldo_actual - 1
-                        nodo.valido = True
-                    
-                    nodo.refrescos_comprados = nodo.padre.refrescos_comprados if nodo.padre else 0
-                    
-            elif len(nodo.hijos) == 3:
-                # A → { C }
-                nodo_c = nodo.hijos[1]  # El nodo C interno
-                # Incrementar nivel para el bloque anidado
-                self._decorar_arbol(nodo_c, nivel + 1)
-                
-                # El bloque anidado es independiente, no transfiere saldo
-                nodo.saldo = nodo.padre.saldo if nodo.padre else 0
-                nodo.valido = nodo_c.valido
-                nodo.refrescos_comprados = nodo.padre.refrescos_comprados if nodo.padre else 0
-                nodo.errores.extend(nodo_c.errores)
-        
-        # Decorar hijos restantes
-        for hijo in nodo.hijos:
-            if hijo.simbolo in ["{", "}", "ε"]:
-                continue
-            if not hasattr(hijo, 'saldo'):
-                self._decorar_arbol(hijo, nivel)
+                nodo.err_end = len(self.errores_globales)
 
-    def imprimir_arbol_visual(self, nodo: Nodo, prefijo: str = "", es_ultimo: bool = True, es_raiz: bool = True) -> str:
-        """Imprime el árbol de derivación con formato visual decorado"""
-        resultado = []
-        
-        # Construir la línea actual
-        if es_raiz:
-            linea_actual = ""
+    def _decorar_con_kernel(self, raiz: Nodo):
+        """Decora el árbol con el kernel compilado sobre la forma SoA
+
+        Aplana el árbol, corre analizador_kernel.decorar_arbol sobre los
+        arreglos, copia los atributos de vuelta y materializa los eventos
+        de error como mensajes en los nodos.
+        """
+        arbol = Arbol.desde_nodo(raiz)
+        eventos, err_start, err_end = analizador_kernel.decorar_arbol(arbol)
+        arbol.aplicar_a_nodos(raiz)
+
+        # Materializar los eventos como mensajes, en el mismo orden de
+        # recorrido en que la decoración en Python los habría generado
+        base = len(self.errores_globales)
+        for _, codigo, argumento in eventos:
+            if codigo == analizador_kernel.ERR_NIVEL:
+                self.errores_globales.append(f"Excede el límite de 3 niveles de anidación (nivel {argumento})")
+            elif codigo == analizador_kernel.ERR_SALDO:
+                self.errores_globales.append(f"Saldo insuficiente para comprar refresco (saldo: {argumento}, necesario: 3)")
+            elif codigo == analizador_kernel.ERR_REFRESCOS:
+                self.errores_globales.append("Excede el máximo de 3 refrescos por bloque")
+            else:
+                self.errores_globales.append("No hay monedas para devolver")
+
+        if not eventos:
+            return
+
+        # Los ids del kernel siguen el mismo orden por niveles que desde_nodo
+        nodos = [raiz]
+        i = 0
+        while i < len(nodos):
+            nodos.extend(nodos[i].hijos)
+            i += 1
+
+        for nodo_id, nodo in enumerate(nodos):
+            if nodo.tipo == "no_terminal":
+                nodo.err_start = base + err_start[nodo_id]
+                nodo.err_end = base + err_end[nodo_id]
+
+    def _expandir_P(self, nodo: Nodo, nivel: int, pila: list):
+        """Expande P → { C }"""
+        if len(nodo.hijos) >= 2:
+            pila.append((nodo, nivel, 1))
+            pila.append((nodo.hijos[1], nivel, 0))
+
+    def _expandir_C(self, nodo: Nodo, nivel: int, pila: list):
+        """Expande C → A C | ε"""
+        if len(nodo.hijos) == 1 and nodo.hijos[0].simbolo == "ε":
+            # C → ε
+            nodo.saldo = 0
+            nodo.valido = True
+            nodo.refrescos_comprados = 0
+        elif len(nodo.hijos) == 2:
+            # C → A C: decorar A primero
+            pila.append((nodo, nivel, 1))
+            pila.append((nodo.hijos[0], nivel, 0))
+
+    def _expandir_A(self, nodo: Nodo, nivel: int, pila: list):
+        """Expande A → $ | R | < | { C }"""
+        if len(nodo.hijos) == 1:
+            accion = self._acciones.get(nodo.hijos[0].simbolo)
+            if accion:
+                accion(nodo)
+            nodo.err_end = len(self.errores_globales)
+        elif len(nodo.hijos) == 3:
+            # A → { C }: incrementar nivel para el bloque anidado
+            pila.append((nodo, nivel, 1))
+            pila.append((nodo.hijos[1], nivel + 1, 0))
+
+    def _sintetizar_P(self, nodo: Nodo, nivel: int, pila: list):
+        """Sintetiza P → { C }"""
+        nodo_c = nodo.hijos[1]
+        nodo.saldo = nodo_c.saldo
+        nodo.valido = nodo_c.valido
+        nodo.refrescos_comprados = nodo_c.refrescos_comprados
+        nodo.err_end = len(self.errores_globales)
+
+    def _sintetizar_C(self, nodo: Nodo, nivel: int, pila: list):
+        """Sintetiza C → A C: hereda el estado de A y decora el C hermano"""
+        nodo_a = nodo.hijos[0]
+        nodo_c = nodo.hijos[1]
+
+        nodo.saldo = nodo_a.saldo
+        nodo.valido = nodo_a.valido
+        nodo.refrescos_comprados = nodo_a.refrescos_comprados
+
+        # Decorar C con el estado actualizado
+        nodo_c.saldo = nodo.saldo
+        nodo_c.refrescos_comprados = nodo.refrescos_comprados
+        pila.append((nodo, nivel, 2))
+        pila.append((nodo_c, nivel, 0))
+
+    def _sintetizar_A_bloque(self, nodo: Nodo, nivel: int, pila: list):
+        """Sintetiza A → { C }: el bloque anidado no transfiere saldo"""
+        nodo_c = nodo.hijos[1]
+        nodo.saldo = nodo.padre.saldo if nodo.padre else 0
+        nodo.valido = nodo_c.valido
+        nodo.refrescos_comprados = nodo.padre.refrescos_comprados if nodo.padre else 0
+        nodo.err_end = len(self.errores_globales)
+
+    def _accion_moneda(self, nodo: Nodo):
+        """A → $: insertar moneda"""
+        nodo.saldo = (nodo.padre.saldo if nodo.padre else 0) + 1
+        nodo.valido = True
+        nodo.refrescos_comprados = nodo.padre.refrescos_comprados if nodo.padre else 0
+
+    def _accion_refresco(self, nodo: Nodo):
+        """A → R: comprar refresco"""
+        saldo_actual = nodo.padre.saldo if nodo.padre else 0
+        refrescos_actual = nodo.padre.refrescos_comprados if nodo.padre else 0
+
+        if saldo_actual < 3:
+            nodo.valido = False
+            self.errores_globales.append(f"Saldo insuficiente para comprar refresco (saldo: {saldo_actual}, necesario: 3)")
+            nodo.saldo = saldo_actual
+            nodo.refrescos_comprados = refrescos_actual
+        elif refrescos_actual >= 3:
+            nodo.valido = False
+            self.errores_globales.append("Excede el máximo de 3 refrescos por bloque")
+            nodo.saldo = saldo_actual
+            nodo.refrescos_comprados = refrescos_actual
         else:
-            conector = "└── " if es_ultimo else "├── "
-            linea_actual = prefijo + conector
-        
-        # Mostrar información del nodo
-        if nodo.tipo == "no_terminal":
-            atributos = f"[saldo={nodo.saldo}, valido={nodo.valido}, nivel={nodo.nivel}, refrescos={nodo.refrescos_comprados}]"
-            resultado.append(f"{linea_actual}{nodo.simbolo}{atributos}")
-            
-            # Mostrar errores si existen
-            if nodo.errores:
-                error_prefijo = prefijo + ("    " if es_ultimo else "│   ")
-                for error in nodo.errores:
-                    resultado.append(f"{error_prefijo}⚠ ERROR: {error}")
+            nodo.saldo = saldo_actual - 3
+            nodo.valido = True
+            nodo.refrescos_comprados = refrescos_actual + 1
+
+    def _accion_devolucion(self, nodo: Nodo):
+        """A → <: devolver moneda"""
+        saldo_actual = nodo.padre.saldo if nodo.padre else 0
+
+        if saldo_actual < 1:
+            nodo.valido = False
+            self.errores_globales.append("No hay monedas para devolver")
+            nodo.saldo = saldo_actual
         else:
-            # Para terminales, solo mostrar el símbolo
-            resultado.append(f"{linea_actual}{nodo.simbolo}")
-        
-        # Procesar hijos
-        if nodo.hijos:
-            # Calcular nuevo prefijo para los hijos
+            nodo.saldo = saldo_actual - 1
+            nodo.valido = True
+
+        nodo.refrescos_comprados = nodo.padre.refrescos_comprados if nodo.padre else 0
+
+    def imprimir_arbol_visual(self, nodo: Nodo, prefijo: str = "", es_ultimo: bool = True, es_raiz: bool = True) -> str:
+        """Imprime el árbol de derivación con formato visual decorado"""
+        buf = io.StringIO()
+        self._render_visual(nodo, buf, prefijo, es_ultimo, es_raiz)
+        return buf.getvalue()
+
+    def _render_visual(self, raiz: Nodo, buf, prefijo: str = "",
+                       es_ultimo: bool = True, es_raiz: bool = True):
+        """DFS iterativo que escribe el árbol línea a línea en buf
+
+        Un único buffer evita el join por nivel de la versión recursiva,
+        que reensamblaba las mismas líneas una vez por ancestro.
+        """
+        pila = [(raiz, prefijo, es_ultimo, es_raiz)]
+        primera = True
+
+        while pila:
+            nodo, prefijo, es_ultimo, es_raiz = pila.pop()
+
+            # Construir la línea actual
             if es_raiz:
-                nuevo_prefijo = ""
+                linea_actual = ""
             else:
-                nuevo_prefijo = prefijo + ("    " if es_ultimo else "│   ")
-            
-            # Procesar cada hijo
-            for i, hijo in enumerate(nodo.hijos):
-                es_ultimo_hijo = (i == len(nodo.hijos) - 1)
-                resultado.append(self.imprimir_arbol_visual(hijo, nuevo_prefijo, es_ultimo_hijo, False))
-        
-        return "\n".join(resultado)
+                conector = "└── " if es_ultimo else "├── "
+                linea_actual = prefijo + conector
+
+            if primera:
+                primera = False
+            else:
+                buf.write("\n")
+
+            # Mostrar información del nodo
+            if nodo.tipo == "no_terminal":
+                atributos = f"[saldo={nodo.saldo}, valido={nodo.valido}, nivel={nodo.nivel}, refrescos={nodo.refrescos_comprados}]"
+                buf.write(f"{linea_actual}{nodo.simbolo}{atributos}")
+
+                # Mostrar errores si existen (rango del subárbol en la lista global)
+                errores = self.errores_globales[nodo.err_start:nodo.err_end]
+                if errores:
+                    error_prefijo = prefijo + ("    " if es_ultimo else "│   ")
+                    for error in errores:
+                        buf.write(f"\n{error_prefijo}⚠ ERROR: {error}")
+            else:
+                # Para terminales, solo mostrar el símbolo
+                buf.write(f"{linea_actual}{nodo.simbolo}")
+
+            # Apilar los hijos en orden inverso para que salgan en orden natural
+            if nodo.hijos:
+                if es_raiz:
+                    nuevo_prefijo = ""
+                else:
+                    nuevo_prefijo = prefijo + ("    " if es_ultimo else "│   ")
+
+                ultimo = len(nodo.hijos) - 1
+                for i in range(ultimo, -1, -1):
+                    pila.append((nodo.hijos[i], nuevo_prefijo, i == ultimo, False))
 
     def imprimir_arbol(self, nodo: Nodo, nivel: int = 0) -> str:
-        """Imprime el árbol de derivación decorado (formato original)"""
-        resultado = []
-        indentacion = "  " * nivel
-        
-        if nodo.tipo == "no_terminal":
-            info = f"saldo={nodo.saldo}, valido={nodo.valido}, nivel={nodo.nivel}, refrescos={nodo.refrescos_comprados}"
-            resultado.append(f"{indentacion}{nodo.simbolo} ({info})")
-            if nodo.errores:
-                for error in nodo.errores:
+        """Imprime el árbol de derivación decorado (formato original)
+
+        Un DFS iterativo acumula las líneas en una sola lista y las une
+        con un único join, en vez del join por subárbol de la versión
+        recursiva que reensamblaba las mismas líneas una vez por ancestro.
+        """
+        resultado: List[str] = []
+        pila = [(nodo, nivel)]
+
+        while pila:
+            nodo, nivel = pila.pop()
+            indentacion = "  " * nivel
+
+            if nodo.tipo == "no_terminal":
+                info = f"saldo={nodo.saldo}, valido={nodo.valido}, nivel={nodo.nivel}, refrescos={nodo.refrescos_comprados}"
+                resultado.append(f"{indentacion}{nodo.simbolo} ({info})")
+                for error in self.errores_globales[nodo.err_start:nodo.err_end]:
                     resultado.append(f"{indentacion}  ERROR: {error}")
-        else:
-            resultado.append(f"{indentacion}{nodo.simbolo}")
-        
-        for hijo in nodo.hijos:
-            resultado.append(self.imprimir_arbol(hijo, nivel + 1))
-        
+            else:
+                resultado.append(f"{indentacion}{nodo.simbolo}")
+
+            for hijo in reversed(nodo.hijos):
+                pila.append((hijo, nivel + 1))
+
         return "\n".join(resultado)
 
 class InterfazGrafica:
@@ -415,55 +887,59 @@ class InterfazGrafica:
         
         # Variable para almacenar el último análisis
         self.ultimo_arbol = None
+
+        # Tramo (índices Tk) que ocupa el árbol dentro del área de texto,
+        # para reemplazar solo esa parte al cambiar de formato
+        self._tree_start_idx = None
+        self._tree_end_idx = None
         
     def cambiar_formato(self):
         """Cambia el formato de visualización del árbol"""
         if hasattr(self, 'ultimo_arbol') and self.ultimo_arbol:
             self.mostrar_arbol()
     
+    def _localizar_tramo_arbol(self) -> bool:
+        """Reubica el tramo del árbol buscando su encabezado en el texto
+
+        Respaldo para cuando los índices registrados por analizar no están
+        disponibles: tres búsquedas con str.find sobre el contenido, sin
+        partirlo en una lista de líneas. El tramo va desde el final de la
+        línea de guiones hasta la primera línea en blanco.
+        """
+        contenido = self.text_area.get(1.0, tk.END)
+        inicio = contenido.find("ÁRBOL DE DERIVACIÓN DECORADO:")
+        if inicio < 0:
+            return False
+        fin_encabezado = contenido.find("\n", inicio) + 1
+        fin_guiones = contenido.find("\n", fin_encabezado) + 1
+        fin = contenido.find("\n\n", fin_guiones)
+        if fin_encabezado == 0 or fin_guiones == 0 or fin < 0:
+            return False
+        self._tree_start_idx = self.text_area.index(f"1.0 + {fin_guiones} chars")
+        self._tree_end_idx = self.text_area.index(f"1.0 + {fin} chars")
+        return True
+
     def mostrar_arbol(self):
         """Muestra el árbol en el formato seleccionado"""
         if not self.ultimo_arbol:
             return
-            
+        if self._tree_start_idx is None and not self._localizar_tramo_arbol():
+            return
+
         formato = self.formato_var.get()
-        
+
         if formato == "visual":
             arbol_texto = self.analizador.imprimir_arbol_visual(self.ultimo_arbol)
         else:
             arbol_texto = self.analizador.imprimir_arbol(self.ultimo_arbol)
-        
-        # Encontrar la posición del árbol en el texto actual
-        contenido_actual = self.text_area.get(1.0, tk.END)
-        lineas = contenido_actual.split('\n')
-        
-        # Buscar donde comienza el árbol
-        inicio_arbol = -1
-        for i, linea in enumerate(lineas):
-            if "ÁRBOL DE DERIVACIÓN DECORADO:" in linea:
-                inicio_arbol = i + 2  # Saltar la línea de guiones
-                break
-        
-        if inicio_arbol != -1:
-            # Reemplazar solo la parte del árbol
-            nuevas_lineas = lineas[:inicio_arbol] + [arbol_texto] + lineas[inicio_arbol:]
-            
-            # Buscar donde termina el árbol (próxima sección)
-            fin_arbol = -1
-            for i in range(inicio_arbol + 1, len(nuevas_lineas)):
-                if nuevas_lineas[i].strip() and (nuevas_lineas[i].startswith("ERRORES") or nuevas_lineas[i].startswith("✓") or nuevas_lineas[i].startswith("=")):
-                    fin_arbol = i
-                    break
-            
-            if fin_arbol != -1:
-                # Reconstruir el texto manteniendo solo el nuevo árbol
-                resultado_final = nuevas_lineas[:inicio_arbol] + [arbol_texto] + ["\n"] + nuevas_lineas[fin_arbol:]
-            else:
-                resultado_final = nuevas_lineas[:inicio_arbol] + [arbol_texto]
-            
-            self.text_area.delete(1.0, tk.END)
-            self.text_area.insert(tk.END, "\n".join(resultado_final))
-        
+
+        # Reemplazar solo el tramo del árbol, sin releer ni reconstruir
+        # el resto del contenido del widget
+        self.text_area.delete(self._tree_start_idx, self._tree_end_idx)
+        self.text_area.insert(self._tree_start_idx, arbol_texto)
+        self._tree_end_idx = self.text_area.index(
+            f"{self._tree_start_idx} + {len(arbol_texto)} chars")
+
     def analizar(self):
         """Analiza la cadena ingresada"""
         cadena = self.entry_cadena.get().strip()
@@ -484,44 +960,53 @@ class InterfazGrafica:
             
             # Mostrar árbol y análisis
             self.text_area.delete(1.0, tk.END)
-            
+
             if arbol:
-                resultado_texto = f"ANÁLISIS SEMÁNTICO DE: {cadena}\n"
-                resultado_texto += "=" * 60 + "\n\n"
-                resultado_texto += "ÁRBOL DE DERIVACIÓN DECORADO:\n"
-                resultado_texto += "-" * 35 + "\n"
-                
+                encabezado = f"ANÁLISIS SEMÁNTICO DE: {cadena}\n"
+                encabezado += "=" * 60 + "\n\n"
+                encabezado += "ÁRBOL DE DERIVACIÓN DECORADO:\n"
+                encabezado += "-" * 35 + "\n"
+
                 # Usar el formato seleccionado
                 formato = self.formato_var.get()
                 if formato == "visual":
-                    resultado_texto += self.analizador.imprimir_arbol_visual(arbol)
+                    arbol_texto = self.analizador.imprimir_arbol_visual(arbol)
                 else:
-                    resultado_texto += self.analizador.imprimir_arbol(arbol)
-                
-                resultado_texto += "\n\n"
-                
+                    arbol_texto = self.analizador.imprimir_arbol(arbol)
+
+                resto = "\n\n"
+
                 if self.analizador.errores_globales:
-                    resultado_texto += "ERRORES ENCONTRADOS:\n"
-                    resultado_texto += "-" * 20 + "\n"
+                    resto += "ERRORES ENCONTRADOS:\n"
+                    resto += "-" * 20 + "\n"
                     for i, error in enumerate(self.analizador.errores_globales, 1):
-                        resultado_texto += f"{i}. {error}\n"
+                        resto += f"{i}. {error}\n"
                 else:
-                    resultado_texto += "✓ No se encontraron errores semánticos\n"
-                    
-                resultado_texto += "\n" + "=" * 60 + "\n"
-                
+                    resto += "✓ No se encontraron errores semánticos\n"
+
+                resto += "\n" + "=" * 60 + "\n"
+
                 if es_valida:
-                    resultado_texto += f"RESULTADO: La cadena '{cadena}' es SEMÁNTICAMENTE VÁLIDA\n"
+                    resto += f"RESULTADO: La cadena '{cadena}' es SEMÁNTICAMENTE VÁLIDA\n"
                 else:
-                    resultado_texto += f"RESULTADO: La cadena '{cadena}' es SEMÁNTICAMENTE INVÁLIDA\n"
-                    
+                    resto += f"RESULTADO: La cadena '{cadena}' es SEMÁNTICAMENTE INVÁLIDA\n"
+
+                # Insertar por tramos, recordando dónde queda el árbol para
+                # que mostrar_arbol pueda reemplazar solo esa parte
+                self.text_area.insert(tk.END, encabezado)
+                self._tree_start_idx = self.text_area.index("end-1c")
+                self.text_area.insert(tk.END, arbol_texto)
+                self._tree_end_idx = self.text_area.index("end-1c")
+                self.text_area.insert(tk.END, resto)
+
             else:
+                self._tree_start_idx = None
+                self._tree_end_idx = None
                 resultado_texto = "ERROR: No se pudo construir el árbol de derivación\n"
                 for error in self.analizador.errores_globales:
                     resultado_texto += f"- {error}\n"
-            
-            self.text_area.insert(tk.END, resultado_texto)
-            
+                self.text_area.insert(tk.END, resultado_texto)
+
         except Exception as e:
             messagebox.showerror("Error", f"Error durante el análisis: {str(e)}")
     
@@ -559,7 +1044,10 @@ class InterfazGrafica:
         self.entry_cadena.delete(0, tk.END)
         self.text_area.delete(1.0, tk.END)
         self.label_resultado.config(text="")
+        self.analizador.limpiar_cache()
         self.ultimo_arbol = None
+        self._tree_start_idx = None
+        self._tree_end_idx = None
     
     def ejecutar(self):
         """Ejecuta la interfaz gráfica"""
@@ -633,9 +1121,11 @@ def main():
         print("Opciones de visualización:")
         print("1. Formato visual (como árbol)")
         print("2. Formato indentado (original)")
-        formato_opcion = input("Seleccione formato (1-2): ").strip()
+        print("3. Solo validez (sin árbol)")
+        formato_opcion = input("Seleccione formato (1-3): ").strip()
         usar_formato_visual = formato_opcion == "1"
-        
+        solo_validez = formato_opcion == "3"
+
         try:
             with open(nombre_archivo, 'r', encoding='utf-8') as archivo:
                 cadenas = [linea.strip() for linea in archivo if linea.strip()]
@@ -647,13 +1137,33 @@ def main():
             
             with open(nombre_salida, 'w', encoding='utf-8') as salida:
                 salida.write("=== ANÁLISIS SEMÁNTICO - MÁQUINA EXPENDEDORA ===\n")
-                salida.write(f"Formato: {'Visual' if usar_formato_visual else 'Indentado'}\n\n")
-                
+                if solo_validez:
+                    salida.write("Formato: Solo validez\n\n")
+                else:
+                    salida.write(f"Formato: {'Visual' if usar_formato_visual else 'Indentado'}\n\n")
+
                 for i, cadena in enumerate(cadenas, 1):
                     salida.write(f"CADENA {i}: {cadena}\n")
                     salida.write("="*60 + "\n")
-                    
+
                     try:
+                        if solo_validez:
+                            # Una sola pasada sin construir ni decorar el
+                            # árbol: suficiente cuando solo importa el
+                            # veredicto de cada línea
+                            es_valida, errores = analizador.validar_rapido(cadena)
+
+                            if errores:
+                                salida.write("ERRORES ENCONTRADOS:\n")
+                                salida.write("-" * 20 + "\n")
+                                for j, error in enumerate(errores, 1):
+                                    salida.write(f"{j}. {error}\n")
+                                salida.write("\n")
+
+                            salida.write(f"RESULTADO: {'VÁLIDA' if es_valida else 'INVÁLIDA'}\n")
+                            salida.write("\n" + "="*60 + "\n\n")
+                            continue
+
                         arbol, es_valida = analizador.analizar_cadena(cadena)
                         
                         if arbol: